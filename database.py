@@ -1,18 +1,95 @@
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from collections.abc import Sequence
+import sqlalchemy
+from sqlalchemy import MetaData
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase
 from dotenv import load_dotenv
+import logging
 import os
+import pickle
+import tempfile
 
 load_dotenv()
 
 URL_DATABASE = os.getenv("DATABASE_URL")
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+METADATA_CACHE_PATH = os.getenv("DB_METADATA_CACHE", "metadata.pkl")
 
-engine = create_engine(URL_DATABASE)
+engine = create_async_engine(
+    URL_DATABASE,
+    pool_size=POOL_SIZE,
+    max_overflow=POOL_MAX_OVERFLOW,
+    pool_timeout=POOL_TIMEOUT_SECONDS,
+    pool_pre_ping=True,
+    pool_recycle=POOL_RECYCLE_SECONDS,
+)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 class Base(DeclarativeBase):
     pass
 
 metadata = MetaData()
-metadata.reflect(bind=engine)
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+#Database the schema cache belongs to, without credentials
+SCHEMA_CACHE_SOURCE = engine.url.set(username=None, password=None).render_as_string()
+
+
+#Load a previously pickled schema, if it was written for this database and SQLAlchemy version and covers every requested table
+def load_cached_metadata(table_names: Sequence[str]) -> MetaData | None:
+    if not METADATA_CACHE_PATH or not os.path.exists(METADATA_CACHE_PATH):
+        return None
+
+    #The header is a plain dict checked before the MetaData itself is unpickled
+    try:
+        with open(METADATA_CACHE_PATH, "rb") as cache_file:
+            header = pickle.load(cache_file)
+            if header != schema_cache_header():
+                return None
+            cached_metadata = pickle.load(cache_file)
+    except Exception as exc:
+        #The cache is only an optimization, any unreadable file falls back to reflection
+        logger.warning("Ignoring unreadable schema cache %s: %r", METADATA_CACHE_PATH, exc)
+        return None
+
+    if not isinstance(cached_metadata, MetaData) or not set(table_names) <= set(cached_metadata.tables):
+        return None
+    return cached_metadata
+
+
+def schema_cache_header() -> dict[str, str]:
+    return {"source": SCHEMA_CACHE_SOURCE, "sqlalchemy": sqlalchemy.__version__}
+
+
+#Write the cache to a temp file first so concurrent workers never read a partial pickle
+def save_cached_metadata() -> None:
+    cache_dir = os.path.dirname(os.path.abspath(METADATA_CACHE_PATH))
+    cache_file = None
+    try:
+        with tempfile.NamedTemporaryFile("wb", dir=cache_dir, delete=False) as cache_file:
+            pickle.dump(schema_cache_header(), cache_file)
+            pickle.dump(metadata, cache_file)
+        os.replace(cache_file.name, METADATA_CACHE_PATH)
+    except OSError as exc:
+        logger.warning("Could not write the schema cache to %s: %s", METADATA_CACHE_PATH, exc)
+        if cache_file is not None and os.path.exists(cache_file.name):
+            os.unlink(cache_file.name)
+
+
+#Reflect only the given tables (called once from the app lifespan), reusing the pickled schema when present
+async def reflect_metadata(table_names: Sequence[str]) -> None:
+    cached = load_cached_metadata(table_names)
+    if cached is not None:
+        for table in cached.tables.values():
+            table.to_metadata(metadata)
+        return
+
+    async with engine.connect() as conn:
+        await conn.run_sync(metadata.reflect, only=list(table_names))
+
+    if METADATA_CACHE_PATH:
+        save_cached_metadata()
@@ -1,31 +1,91 @@
-import json
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import Annotated, Any
-from urllib.error import HTTPError, URLError
 from urllib.parse import urlparse, urlunparse
-from urllib.request import Request, urlopen
 
-from fastapi import Depends, FastAPI, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+import httpx
+import orjson
+from cachetools import TTLCache
+from fastapi import Depends, FastAPI, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy import Column, Connection, Select, Table, bindparam, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import SessionLocal, metadata
+from database import SessionLocal, engine, metadata, reflect_metadata
 
-app = FastAPI()
 
-HTTP_TIMEOUT_SECONDS = float(os.getenv("FIVEM_HTTP_TIMEOUT", "5"))
-DEFAULT_FIVEM_SERVER_URL = os.getenv("FIVEM_SERVER_URL")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await reflect_metadata(TABLE_NAMES)
+    cache_schema_objects()
+    await warn_missing_lookup_indexes()
+    yield
+    await http_client.aclose()
+    await engine.dispose()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT_SECONDS = float(os.getenv("FIVEM_HTTP_TIMEOUT", "5"))
+DEFAULT_FIVEM_SERVER_URL = os.getenv("FIVEM_SERVER_URL")
+OVERVIEW_CACHE_TTL_SECONDS = float(os.getenv("FIVEM_OVERVIEW_CACHE_TTL", "5"))
+RECORD_CACHE_TTL_SECONDS = float(os.getenv("DB_RECORD_CACHE_TTL", "30"))
+OVERVIEW_MAX_PLAYERS = 50
+PAGE_SIZE_DEFAULT = 100
+PAGE_SIZE_MAX = 500
+
+#Shared FiveM client; idle connections outlive the overview cache TTL so refreshes reuse them
+http_client = httpx.AsyncClient(
+    timeout=HTTP_TIMEOUT_SECONDS,
+    headers={"Accept": "application/json", "User-Agent": "sector5api/1.0"},
+    limits=httpx.Limits(
+        max_connections=16,
+        max_keepalive_connections=16,
+        keepalive_expiry=max(30.0, OVERVIEW_CACHE_TTL_SECONDS * 2),
+    ),
+)
+
+#Recent encoded FiveM overviews per base URL, plus the fetch in flight per URL so concurrent misses share it
+_overview_cache: TTLCache = TTLCache(maxsize=8, ttl=OVERVIEW_CACHE_TTL_SECONDS)
+_overview_fetches: dict[str, asyncio.Task] = {}
+
+#Recent by-id lookups, keyed by (kind, table, column, value)
+_record_cache: TTLCache = TTLCache(maxsize=10_000, ttl=RECORD_CACHE_TTL_SECONDS)
+
+#Tables and columns used by the endpoints, resolved once after reflection
+TABLE_NAMES = ("users", "players", "properties", "player_vehicles")
+LOOKUP_COLUMNS = (("users", "userId"), ("properties", "owner"), ("player_vehicles", "citizenid"))
+TABLES: dict[str, Table] = {}
+KEYSET_COLUMNS: dict[str, Column] = {}
+LIST_SELECTS: dict[str, Select] = {}
+LOOKUP_SELECTS: dict[tuple[str, str], Select] = {}
+
+#Columns returned by the list endpoints; names missing from the schema are skipped
+USERS_LIST_COLUMNS = ("userId", "identifier", "username", "name", "license")
+PLAYERS_LIST_COLUMNS = ("id", "citizenid", "cid", "license", "name", "last_updated")
+PROPERTIES_LIST_COLUMNS = ("id", "owner", "property_name", "label", "price")
+VEHICLES_LIST_COLUMNS = ("id", "citizenid", "plate", "vehicle", "model", "garage", "state")
+LIST_COLUMNS = {
+    "users": USERS_LIST_COLUMNS,
+    "players": PLAYERS_LIST_COLUMNS,
+    "properties": PROPERTIES_LIST_COLUMNS,
+    "player_vehicles": VEHICLES_LIST_COLUMNS,
+}
+
+
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
+limit_query = Annotated[int, Query(ge=1, le=PAGE_SIZE_MAX)]
+offset_query = Annotated[int, Query(ge=0)]
 
 
 #Normalize FiveM Server URL
@@ -43,8 +103,9 @@ def normalize_base_url(url: str) -> str:
     return urlunparse((parsed.scheme, parsed.netloc, "", "", "", "")).rstrip("/")
 
 
-#Build Fivem Server URL Candidates
-def build_fivem_candidates(base_url: str) -> list[str]:
+#Build Fivem Server URL Candidates (memoized, the configured URL never changes at runtime)
+@lru_cache(maxsize=16)
+def build_fivem_candidates(base_url: str) -> tuple[str, ...]:
     normalized = normalize_base_url(base_url)
     parsed = urlparse(normalized)
     candidates = [normalized]
@@ -57,7 +118,7 @@ def build_fivem_candidates(base_url: str) -> list[str]:
             if alt_url not in candidates:
                 candidates.append(alt_url)
 
-    return candidates
+    return tuple(candidates)
 
 
 def parse_int(value: Any) -> int | None:
@@ -67,18 +128,13 @@ def parse_int(value: Any) -> int | None:
         return None
 
 
-def fetch_json_from_candidate(candidate: str, path: str) -> Any:
-    request = Request(
-        f"{candidate}{path}",
-        headers={"Accept": "application/json", "User-Agent": "sector5api/1.0"},
-    )
-
-    with urlopen(request, timeout=HTTP_TIMEOUT_SECONDS) as response:
-        body = response.read().decode("utf-8", errors="replace")
+async def fetch_json_from_candidate(candidate: str, path: str) -> Any:
+    response = await http_client.get(f"{candidate}{path}")
+    response.raise_for_status()
 
     try:
-        return json.loads(body)
-    except json.JSONDecodeError as exc:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError as exc:
         raise ValueError(f"Respuesta no JSON en {candidate}{path}") from exc
 
 
@@ -107,35 +163,41 @@ def map_player(player: Any, index: int) -> dict[str, Any]:
 
     player_id = player.get("id")
     player_name = player.get("name")
-    ping = parse_int(player.get("ping"))
+    player_name = player_name.strip() if isinstance(player_name, str) else ""
 
     identifiers = player.get("identifiers")
     identifier = None
     if isinstance(identifiers, list):
-        for value in identifiers:
-            if isinstance(value, str) and value.strip():
-                identifier = value.strip()
-                break
+        identifier = next(
+            (stripped for value in identifiers if isinstance(value, str) and (stripped := value.strip())),
+            None,
+        )
 
     return {
         "id": str(player_id) if player_id is not None else f"player-{index + 1}",
-        "name": player_name.strip() if isinstance(player_name, str) and player_name.strip() else f"Jugador {index + 1}",
+        "name": player_name or f"Jugador {index + 1}",
         "identifier": identifier,
-        "ping": ping,
+        "ping": parse_int(player.get("ping")),
     }
 
 
-def collect_fivem_overview(base_url: str) -> dict[str, Any]:
+async def collect_fivem_overview(base_url: str) -> dict[str, Any]:
     errors: list[str] = []
 
     for candidate in build_fivem_candidates(base_url):
-        try:
-            dynamic_data = fetch_json_from_candidate(candidate, "/dynamic.json")
-            players_data = fetch_json_from_candidate(candidate, "/players.json")
-            info_data = fetch_json_from_candidate(candidate, "/info.json")
-        except (HTTPError, URLError, TimeoutError, ValueError) as exc:
-            errors.append(f"{candidate}: {exc}")
+        results = await asyncio.gather(
+            fetch_json_from_candidate(candidate, "/dynamic.json"),
+            fetch_json_from_candidate(candidate, "/players.json"),
+            fetch_json_from_candidate(candidate, "/info.json"),
+            return_exceptions=True,
+        )
+        failure = next((result for result in results if isinstance(result, BaseException)), None)
+        if failure is not None:
+            if not isinstance(failure, (httpx.HTTPError, ValueError)):
+                raise failure
+            errors.append(f"{candidate}: {failure}")
             continue
+        dynamic_data, players_data, info_data = results
 
         if not isinstance(dynamic_data, dict):
             dynamic_data = {}
@@ -143,11 +205,12 @@ def collect_fivem_overview(base_url: str) -> dict[str, Any]:
             info_data = {}
 
         raw_players = players_data if isinstance(players_data, list) else []
-        players = [map_player(player, index) for index, player in enumerate(raw_players)]
+        #Only the first OVERVIEW_MAX_PLAYERS are returned, so only those are mapped
+        players = [map_player(player, index) for index, player in enumerate(raw_players[:OVERVIEW_MAX_PLAYERS])]
 
         players_online = parse_int(dynamic_data.get("clients"))
         if players_online is None:
-            players_online = len(players)
+            players_online = len(raw_players)
 
         players_max = parse_int(dynamic_data.get("sv_maxclients"))
         if players_max is None:
@@ -161,7 +224,7 @@ def collect_fivem_overview(base_url: str) -> dict[str, Any]:
             "hostname": pick_hostname(dynamic_data, info_data),
             "players_online": players_online,
             "players_max": players_max,
-            "players": players[:50],
+            "players": players,
             "error": None,
         }
 
@@ -175,60 +238,187 @@ def collect_fivem_overview(base_url: str) -> dict[str, Any]:
         "error": errors[-1] if errors else "No se pudo conectar con FiveM.",
     }
 
-def fetch_all(db: Session, table_name: str) -> list[dict]:
-    table = metadata.tables[table_name]
-    query = select(table)
-    result = db.execute(query)
-    return [dict(row._mapping) for row in result.fetchall()]
 
-def fetch_one(db: Session, table_name: str, column: str, value) -> dict:
-    table = metadata.tables[table_name]
-    query = select(table).where(table.c[column] == value)
-    result = db.execute(query)
+async def fetch_overview_payload(base_url: str) -> bytes:
+    try:
+        overview = await collect_fivem_overview(base_url)
+        payload = orjson.dumps(overview)
+        #Unreachable results are not cached so outages are not pinned
+        if overview["reachable"]:
+            _overview_cache[base_url] = payload
+        return payload
+    finally:
+        _overview_fetches.pop(base_url, None)
+
+#Encoded overview JSON; cache hits skip both the upstream fetch and serialization
+async def get_cached_fivem_overview(base_url: str) -> bytes:
+    payload = _overview_cache.get(base_url)
+    if payload is not None:
+        return payload
+
+    #Every caller that misses while a fetch is running awaits that same fetch, failures included
+    fetch = _overview_fetches.get(base_url)
+    if fetch is None:
+        fetch = asyncio.create_task(fetch_overview_payload(base_url))
+        _overview_fetches[base_url] = fetch
+    #Shielded so one disconnecting caller does not cancel the fetch for the others
+    return await asyncio.shield(fetch)
+
+def cache_schema_objects() -> None:
+    for table_name in TABLE_NAMES:
+        table = metadata.tables[table_name]
+        TABLES[table_name] = table
+
+        #Pages are ordered by primary key (first column without one)
+        primary_key = list(table.primary_key.columns)
+        order_columns = primary_key or [next(iter(table.c))]
+
+        columns = [table.c[name] for name in LIST_COLUMNS[table_name] if name in table.c]
+        if columns:
+            #The order columns are always returned so clients can read the next after_id
+            projected = {column.key for column in columns}
+            columns += [column for column in order_columns if column.key not in projected]
+        else:
+            logger.warning("None of the list columns exist in %s, listing every column", table_name)
+            columns = [table]
+
+        #after_id is a keyset cursor, which only works on a unique single column
+        if len(primary_key) == 1:
+            KEYSET_COLUMNS[table_name] = primary_key[0]
+        LIST_SELECTS[table_name] = select(*columns).order_by(*order_columns)
+
+    #Lookups bind their value at execution time, so each statement is built once
+    for table_name, column in LOOKUP_COLUMNS:
+        lookup_column = TABLES[table_name].c[column]
+        LOOKUP_SELECTS[(table_name, column)] = select(TABLES[table_name]).where(lookup_column == bindparam("value"))
+
+#Lookup columns that do not lead any index (or the primary key) of their table
+def find_unindexed_lookups(sync_conn: Connection) -> list[tuple[str, str]]:
+    inspector = inspect(sync_conn)
+    unindexed = []
+    for table_name, column in LOOKUP_COLUMNS:
+        leading_columns = {index["column_names"][0] for index in inspector.get_indexes(table_name) if index["column_names"]}
+        primary_key = inspector.get_pk_constraint(table_name)["constrained_columns"]
+        if primary_key:
+            leading_columns.add(primary_key[0])
+        if column not in leading_columns:
+            unindexed.append((table_name, column))
+    return unindexed
+
+async def warn_missing_lookup_indexes() -> None:
+    async with engine.connect() as conn:
+        unindexed = await conn.run_sync(find_unindexed_lookups)
+    for table_name, column in unindexed:
+        logger.warning(
+            "%s.%s is not indexed, lookups on it scan the whole table (see sql/lookup_indexes.sql)",
+            table_name,
+            column,
+        )
+
+def coerce_to_column(column: Column, value: str) -> Any:
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+
+    try:
+        return python_type(value)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"after_id is not a valid {column.name} value",
+        ) from exc
+
+#Fetch one page of a table's list projection, encoded as {"<key>": [...]}
+async def list_response(
+    db: AsyncSession, table_name: str, key: str, limit: int, offset: int, after_id: str | None
+) -> Response:
+    query = LIST_SELECTS[table_name]
+    if after_id is not None:
+        keyset_column = KEYSET_COLUMNS.get(table_name)
+        if keyset_column is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"after_id is not supported for {table_name}, it has no single-column primary key",
+            )
+        query = query.where(keyset_column > coerce_to_column(keyset_column, after_id))
+    query = query.limit(limit).offset(offset)
+
+    #Pages are capped at PAGE_SIZE_MAX rows, so the page is read in one go and encoded once
+    result = await db.execute(query)
+    #Reflected names are quoted_name (a str subclass), which orjson rejects as dict keys
+    columns = [str(column) for column in result.keys()]
+    rows = [dict(zip(columns, row)) for row in result.fetchall()]
+    return Response(content=orjson.dumps({key: rows}, default=jsonable_encoder), media_type="application/json")
+
+async def fetch_one(db: AsyncSession, table_name: str, column: str, value) -> dict:
+    cache_key = ("one", table_name, column, value)
+    record = _record_cache.get(cache_key)
+    if record is not None:
+        return record
+
+    result = await db.execute(LOOKUP_SELECTS[(table_name, column)], {"value": value})
     row = result.fetchone()
     if row is None:
         raise HTTPException(status_code=404, detail=f"{table_name} record not found")
-    return dict(row._mapping)
-
-def fetch_many(db: Session, table_name: str, column: str, value) -> dict:
-    table = metadata.tables[table_name]
-    query = select(table).where(table.c[column] == value)
-    result = db.execute(query)
-    return [dict(row._mapping) for row in result.fetchall()]
+    record = dict(zip(result.keys(), row))
+    _record_cache[cache_key] = record
+    return record
+
+async def fetch_many(db: AsyncSession, table_name: str, column: str, value) -> list[dict]:
+    cache_key = ("many", table_name, column, value)
+    records = _record_cache.get(cache_key)
+    if records is not None:
+        return records
+
+    result = await db.execute(LOOKUP_SELECTS[(table_name, column)], {"value": value})
+    columns = list(result.keys())
+    records = [dict(zip(columns, row)) for row in result.fetchall()]
+    _record_cache[cache_key] = records
+    return records
 
 #USER RELATED ENDPOINTS
 @app.get("/users", status_code=status.HTTP_200_OK)
-async def get_all_users(db: db_dependency):
-    return {"users": fetch_all(db, "users")}
+async def get_all_users(
+    db: db_dependency, limit: limit_query = PAGE_SIZE_DEFAULT, offset: offset_query = 0, after_id: str | None = None
+):
+    return await list_response(db, "users", "users", limit, offset, after_id)
 
 @app.get("/users/by-id/{userId}", status_code=status.HTTP_200_OK)
 async def get_user_by_id(userId: str, db: db_dependency):
-    return {"user": fetch_one(db, "users", "userId", userId)}
+    return {"user": await fetch_one(db, "users", "userId", userId)}
 
 #PLAYER RELATED ENDPOINTS
 @app.get("/players", status_code=status.HTTP_200_OK)
-async def get_all_players(db: db_dependency):
-    return {"players": fetch_all(db, "players")}
+async def get_all_players(
+    db: db_dependency, limit: limit_query = PAGE_SIZE_DEFAULT, offset: offset_query = 0, after_id: str | None = None
+):
+    return await list_response(db, "players", "players", limit, offset, after_id)
 
 @app.get("/players/properties", status_code=status.HTTP_200_OK)
-async def get_all_properties(db: db_dependency):
-    return {"properties": fetch_all(db, "properties")}
+async def get_all_properties(
+    db: db_dependency, limit: limit_query = PAGE_SIZE_DEFAULT, offset: offset_query = 0, after_id: str | None = None
+):
+    return await list_response(db, "properties", "properties", limit, offset, after_id)
 
 @app.get("/players/by-id/{owner}/properties", status_code=status.HTTP_200_OK)
 async def get_player_owned_properties(owner: str, db: db_dependency):
-    return {"properties": fetch_many(db, "properties", "owner", owner)}
+    return {"properties": await fetch_many(db, "properties", "owner", owner)}
 
 @app.get("/players/vehicles", status_code=status.HTTP_200_OK)
-async def get_all_player_vehicles(db: db_dependency):
-    return {"player_vehicles": fetch_all(db, "player_vehicles")}
+async def get_all_player_vehicles(
+    db: db_dependency, limit: limit_query = PAGE_SIZE_DEFAULT, offset: offset_query = 0, after_id: str | None = None
+):
+    return await list_response(db, "player_vehicles", "player_vehicles", limit, offset, after_id)
 
 @app.get("/players/by-id/{citizenid}/vehicles", status_code=status.HTTP_200_OK)
 async def get_player_vehicles(citizenid: str, db: db_dependency):
-    return {"player_vehicles": fetch_many(db, "player_vehicles", "citizenid", citizenid)}
+    return {"player_vehicles": await fetch_many(db, "player_vehicles", "citizenid", citizenid)}
 
 @app.get("/server/overview", status_code=status.HTTP_200_OK)
 async def get_server_overview():
     try:
-        return collect_fivem_overview(DEFAULT_FIVEM_SERVER_URL)
+        payload = await get_cached_fivem_overview(DEFAULT_FIVEM_SERVER_URL)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return Response(content=payload, media_type="application/json")
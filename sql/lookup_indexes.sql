@@ -0,0 +1,4 @@
+-- Indexes for the columns filtered by the /players/by-id/* endpoints.
+-- The API logs a warning at startup while any of them is missing.
+CREATE INDEX idx_properties_owner ON properties (owner);
+CREATE INDEX idx_player_vehicles_citizenid ON player_vehicles (citizenid);
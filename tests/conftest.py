@@ -0,0 +1,42 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+
+#Point the app at a scratch SQLite database before main/database are imported
+_db_dir = tempfile.mkdtemp()
+_db_path = os.path.join(_db_dir, "sector5.sqlite")
+sqlite3.connect(_db_path).executescript(
+    """
+    CREATE TABLE users (
+        userId INTEGER PRIMARY KEY, identifier TEXT, username TEXT, password TEXT, created_at DATETIME, active BOOLEAN
+    );
+    CREATE TABLE players (id INTEGER PRIMARY KEY, citizenid TEXT, name TEXT, inventory TEXT);
+    CREATE TABLE properties (
+        id INTEGER PRIMARY KEY, owner TEXT, price NUMERIC, interior TEXT, purchased_at DATETIME, rented BOOLEAN
+    );
+    CREATE TABLE player_vehicles (id INTEGER PRIMARY KEY, citizenid TEXT, plate TEXT, mods TEXT);
+    INSERT INTO users VALUES
+        (1, 'license:a', 'alpha', 'x', '2024-01-02 03:04:05', 1),
+        (2, 'license:b', 'bravo', 'y', '2024-01-02 03:04:05', 0);
+    INSERT INTO players VALUES (1, 'ABC123', 'Bob', '{}'), (2, 'DEF456', 'Ann', '{}');
+    INSERT INTO properties VALUES (1, 'ABC123', 1500.5, '{}', '2024-01-02 03:04:05', 1);
+    INSERT INTO player_vehicles VALUES (1, 'ABC123', 'S5 0001', '{}'), (2, 'ABC123', 'S5 0002', '{}');
+    """
+)
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_path}"
+os.environ["DB_METADATA_CACHE"] = ""
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
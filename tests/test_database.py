@@ -0,0 +1,85 @@
+import asyncio
+import pickle
+
+import httpx
+from sqlalchemy import MetaData, event
+
+import database
+import main
+
+
+def test_schema_cache_round_trip(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "METADATA_CACHE_PATH", str(tmp_path / "metadata.pkl"))
+    database.save_cached_metadata()
+
+    cached = database.load_cached_metadata(main.TABLE_NAMES)
+
+    assert cached is not None
+    assert set(main.TABLE_NAMES) <= set(cached.tables)
+    assert list(tmp_path.iterdir()) == [tmp_path / "metadata.pkl"]
+
+
+def test_schema_cache_ignored_for_another_database(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "METADATA_CACHE_PATH", str(tmp_path / "metadata.pkl"))
+    database.save_cached_metadata()
+    monkeypatch.setattr(database, "SCHEMA_CACHE_SOURCE", "sqlite+aiosqlite:///other.sqlite")
+
+    assert database.load_cached_metadata(main.TABLE_NAMES) is None
+
+
+def test_warm_start_skips_reflection_queries(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "METADATA_CACHE_PATH", str(tmp_path / "metadata.pkl"))
+    database.save_cached_metadata()
+    monkeypatch.setattr(database, "metadata", MetaData())
+
+    statements = []
+
+    def count_statement(*args):
+        statements.append(args)
+
+    event.listen(database.engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        asyncio.run(database.reflect_metadata(main.TABLE_NAMES))
+    finally:
+        event.remove(database.engine.sync_engine, "before_cursor_execute", count_statement)
+
+    assert statements == []
+    assert set(main.TABLE_NAMES) <= set(database.metadata.tables)
+
+
+def test_schema_cache_ignored_for_another_sqlalchemy_version(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "METADATA_CACHE_PATH", str(tmp_path / "metadata.pkl"))
+    database.save_cached_metadata()
+    monkeypatch.setattr(database.sqlalchemy, "__version__", "0.0.0")
+
+    assert database.load_cached_metadata(main.TABLE_NAMES) is None
+
+
+def test_unloadable_schema_cache_falls_back(client, tmp_path, monkeypatch):
+    cache_path = tmp_path / "metadata.pkl"
+    monkeypatch.setattr(database, "METADATA_CACHE_PATH", str(cache_path))
+    #A pickle referencing a module that no longer exists raises ModuleNotFoundError on load
+    cache_path.write_bytes(pickle.dumps(database.schema_cache_header()) + b"cremoved_module\nRemoved\n.")
+
+    assert database.load_cached_metadata(main.TABLE_NAMES) is None
+
+
+def test_index_check_runs_on_warm_start(client, tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(database, "METADATA_CACHE_PATH", str(tmp_path / "metadata.pkl"))
+    database.save_cached_metadata()
+    fresh_metadata = MetaData()
+    monkeypatch.setattr(database, "metadata", fresh_metadata)
+    monkeypatch.setattr(main, "metadata", fresh_metadata)
+    monkeypatch.setattr(main, "http_client", httpx.AsyncClient())
+
+    async def start_and_stop_app():
+        async with main.lifespan(main.app):
+            pass
+
+    try:
+        client.portal.call(start_and_stop_app)
+    finally:
+        monkeypatch.undo()
+        main.cache_schema_objects()
+
+    assert "player_vehicles.citizenid is not indexed" in caplog.text
@@ -0,0 +1,126 @@
+import asyncio
+
+import orjson
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+
+import main
+
+
+def test_list_players_returns_projected_rows(client):
+    response = client.get("/players")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "players": [
+            {"id": 1, "citizenid": "ABC123", "name": "Bob"},
+            {"id": 2, "citizenid": "DEF456", "name": "Ann"},
+        ]
+    }
+
+
+def test_list_properties_encodes_numeric_columns(client):
+    response = client.get("/players/properties")
+
+    assert response.status_code == 200
+    assert response.json() == {"properties": [{"id": 1, "owner": "ABC123", "price": 1500.5}]}
+
+
+def test_get_user_by_id(client):
+    response = client.get("/users/by-id/2")
+
+    assert response.status_code == 200
+    assert response.json()["user"]["username"] == "bravo"
+
+
+def test_get_user_by_id_not_found(client):
+    response = client.get("/users/by-id/99")
+
+    assert response.status_code == 404
+
+
+def test_get_player_vehicles(client):
+    response = client.get("/players/by-id/ABC123/vehicles")
+
+    assert response.status_code == 200
+    assert [vehicle["plate"] for vehicle in response.json()["player_vehicles"]] == ["S5 0001", "S5 0002"]
+
+
+def test_list_page_past_the_end_is_empty(client):
+    response = client.get("/players", params={"offset": 10})
+
+    assert response.status_code == 200
+    assert response.json() == {"players": []}
+
+
+def test_list_query_error_returns_500(client, monkeypatch):
+    broken_select = select(text("missing_column")).select_from(text("players"))
+    monkeypatch.setitem(main.LIST_SELECTS, "players", broken_select)
+
+    response = TestClient(main.app, raise_server_exceptions=False).get("/players")
+
+    assert response.status_code == 500
+
+
+def test_list_keyset_pagination(client):
+    response = client.get("/players", params={"after_id": 1})
+
+    assert response.status_code == 200
+    assert [player["id"] for player in response.json()["players"]] == [2]
+
+
+def test_list_invalid_after_id_returns_400(client):
+    response = client.get("/players", params={"after_id": "abc"})
+
+    assert response.status_code == 400
+
+
+def test_list_projection_always_includes_primary_key(client, monkeypatch):
+    monkeypatch.setitem(main.LIST_COLUMNS, "players", ("name",))
+    main.cache_schema_objects()
+    try:
+        response = client.get("/players", params={"limit": 1})
+    finally:
+        monkeypatch.undo()
+        main.cache_schema_objects()
+
+    assert response.json() == {"players": [{"name": "Bob", "id": 1}]}
+
+
+def test_list_after_id_refused_without_single_column_key(client, monkeypatch):
+    monkeypatch.delitem(main.KEYSET_COLUMNS, "players")
+
+    response = client.get("/players", params={"after_id": 1})
+
+    assert response.status_code == 400
+
+
+def test_overview_outage_is_fetched_once_for_concurrent_callers(monkeypatch):
+    fetches = []
+
+    async def unreachable_overview(base_url):
+        fetches.append(base_url)
+        await asyncio.sleep(0.05)
+        return {"reachable": False, "error": "timed out"}
+
+    monkeypatch.setattr(main, "collect_fivem_overview", unreachable_overview)
+
+    async def poll_concurrently():
+        return await asyncio.gather(*(main.get_cached_fivem_overview("http://outage.test:30120") for _ in range(6)))
+
+    payloads = asyncio.run(poll_concurrently())
+
+    assert len(fetches) == 1
+    assert {orjson.loads(payload)["reachable"] for payload in payloads} == {False}
+
+    #The failure is not cached, so the next poll tries the upstream again
+    asyncio.run(poll_concurrently())
+    assert len(fetches) == 2
+
+
+def test_by_id_endpoints_encode_column_types_alike(client):
+    user = client.get("/users/by-id/1").json()["user"]
+    properties = client.get("/players/by-id/ABC123/properties").json()["properties"]
+
+    assert user["created_at"] == properties[0]["purchased_at"] == "2024-01-02T03:04:05"
+    assert user["active"] is properties[0]["rented"] is True